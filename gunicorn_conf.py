@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration for production deployments
+
+Run with: gunicorn -c gunicorn_conf.py main:app
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('SERVICE_HOST', '0.0.0.0')}:{os.getenv('SERVICE_PORT', 8085)}"
+workers = int(os.getenv("WEB_CONCURRENCY") or (multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5
+timeout = 30
+accesslog = None
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
@@ -3,9 +3,16 @@ PramaIA Google OAuth2 Service
 Centralized OAuth2 authentication for all Google services (Gmail, Drive, Calendar, etc.)
 """
 import os
+
+# Disable oauthlib scope verification - Google may return additional scopes
+# from previously authorized services. Must be set before oauthlib is imported.
+os.environ.setdefault("OAUTHLIB_RELAX_TOKEN_SCOPE", "1")
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 import logging
 
@@ -27,9 +34,14 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="PramaIA Google OAuth2 Service",
     description="Centralized OAuth2 authentication for Google services",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Gzip responses over 500 bytes (callback HTML, token lists); added before
+# CORS so compressed responses still carry the CORS headers
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=6)
+
 # CORS middleware
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -40,6 +52,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Static assets (callback page stylesheet)
+app.mount("/static", StaticFiles(directory="static"), name="static")
+
 # Include routes
 app.include_router(oauth_routes.router, prefix="/oauth", tags=["OAuth2 Flow"])
 app.include_router(token_routes.router, prefix="/api", tags=["Token Management"])
@@ -51,14 +66,22 @@ async def startup_event():
     await init_database()
     logger.info(f"Service running on port {os.getenv('SERVICE_PORT', 8085)}")
 
-@app.get("/health")
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared HTTP and cache connections"""
+    from services.oauth_manager import close_oauth_manager
+    from services.cache import get_token_cache
+    await close_oauth_manager()
+    await get_token_cache().aclose()
+
+@app.get("/health", response_model=None)
 async def health_check():
     """Health check endpoint"""
-    return {
+    return ORJSONResponse({
         "status": "healthy",
         "service": "PramaIA Google OAuth2 Service",
         "version": "1.0.0"
-    }
+    })
 
 @app.get("/")
 async def root():
@@ -84,6 +107,23 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
+
+    try:
+        import uvloop  # noqa: F401
+        event_loop = "uvloop"
+    except ImportError:
+        # uvloop is not available on Windows - fall back to asyncio
+        event_loop = "auto"
+
     port = int(os.getenv("SERVICE_PORT", 8085))
     host = os.getenv("SERVICE_HOST", "0.0.0.0")
-    uvicorn.run(app, host=host, port=port)
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        loop=event_loop,
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+        log_level=log_level.lower(),
+        access_log=False,
+    )
@@ -3,17 +3,23 @@ Token management routes
 Get, refresh, and revoke tokens
 """
 from fastapi import APIRouter, HTTPException, Depends, Path
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import logging
 
 from services.oauth_manager import get_oauth_manager
-from services.database import get_session
+from services.database import OAuthToken, get_session
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/token/{userId}/{service}")
+# Constructed once - reused across requests so SQLAlchemy doesn't rebuild
+# the statement per call (PK lookups already go through session.get)
+_TOKENS_BY_USER = select(OAuthToken).where(OAuthToken.user_id == bindparam("uid"))
+
+@router.get("/token/{userId}/{service}", response_model=None)
 async def get_token(
     userId: str = Path(..., description="User identifier"),
     service: str = Path(..., description="Service name"),
@@ -26,27 +32,28 @@ async def get_token(
     try:
         oauth_manager = get_oauth_manager()
         token = await oauth_manager.get_valid_token(userId, service, session)
-        
+
         if not token:
             raise HTTPException(
                 status_code=404,
                 detail=f"No valid token found for user {userId} and service {service}. Please authorize first."
             )
-        
-        return {
+
+        # Direct ORJSONResponse skips FastAPI's response-model validation
+        return ORJSONResponse({
             "access_token": token,
             "token_type": "Bearer",
             "user_id": userId,
             "service": service
-        }
-        
+        })
+
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Failed to get token: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to retrieve token: {str(e)}")
 
-@router.delete("/token/{userId}/{service}")
+@router.delete("/token/{userId}/{service}", response_model=None)
 async def revoke_token(
     userId: str = Path(..., description="User identifier"),
     service: str = Path(..., description="Service name"),
@@ -58,25 +65,25 @@ async def revoke_token(
     try:
         oauth_manager = get_oauth_manager()
         success = await oauth_manager.revoke_token(userId, service, session)
-        
+
         if not success:
             raise HTTPException(
                 status_code=404,
                 detail=f"No token found for user {userId} and service {service}"
             )
-        
-        return {
+
+        return ORJSONResponse({
             "success": True,
             "message": f"Token revoked for user {userId}, service {service}"
-        }
-        
+        })
+
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Failed to revoke token: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to revoke token: {str(e)}")
 
-@router.get("/tokens/{userId}")
+@router.get("/tokens/{userId}", response_model=None)
 async def list_user_tokens(
     userId: str = Path(..., description="User identifier"),
     session: AsyncSession = Depends(get_session)
@@ -85,29 +92,25 @@ async def list_user_tokens(
     List all authorized services for a user
     """
     try:
-        from sqlalchemy import select
-        from services.database import OAuthToken
-        
-        result = await session.execute(
-            select(OAuthToken).where(OAuthToken.user_id == userId)
-        )
+        result = await session.execute(_TOKENS_BY_USER, {"uid": userId})
         tokens = result.scalars().all()
-        
-        return {
+
+        # orjson serializes datetime natively - no isoformat() per row
+        return ORJSONResponse({
             "user_id": userId,
             "authorized_services": [
                 {
                     "service": token.service,
-                    "expires_at": token.expires_at.isoformat(),
+                    "expires_at": token.expires_at,
                     "has_refresh_token": bool(token.refresh_token),
-                    "created_at": token.created_at.isoformat(),
-                    "updated_at": token.updated_at.isoformat()
+                    "created_at": token.created_at,
+                    "updated_at": token.updated_at
                 }
                 for token in tokens
             ],
             "total_services": len(tokens)
-        }
-        
+        })
+
     except Exception as e:
         logger.error(f"Failed to list tokens: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list tokens: {str(e)}")
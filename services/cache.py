@@ -0,0 +1,121 @@
+"""
+Token cache service
+Cache-aside layer for decrypted access tokens, in front of SQLite + Fernet
+"""
+import os
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+class TokenCache:
+    """Short-lived cache for decrypted access tokens
+
+    Uses Redis when REDIS_URL is configured, otherwise an in-process dict
+    with per-key expiry. Entries always carry a TTL shorter than the token
+    lifetime, so a stale token is never served from cache. The in-process
+    store additionally caps TTLs at 5 minutes: with multiple workers each
+    holds a private cache that deletes can't reach, so the cap bounds how
+    long a revoked token can still be served. Use Redis for multi-worker
+    deployments.
+    """
+
+    _MAX_LOCAL_ENTRIES = 10_000
+    # Invalidation can't reach other workers' in-process caches, so cap
+    # local entries at 5 minutes to bound how long a revoked token survives
+    _MAX_LOCAL_TTL = 300
+
+    def __init__(self):
+        self._redis = None
+        self._local = {}  # key -> (value, expires_at_monotonic)
+
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            if aioredis is None:
+                logger.warning("REDIS_URL set but redis package not installed - using in-process cache")
+            else:
+                self._redis = aioredis.from_url(redis_url, decode_responses=True)
+                logger.info("Token cache using Redis")
+
+        if self._redis is None:
+            logger.info("Token cache using in-process TTL store")
+
+    @staticmethod
+    def token_key(user_id: str, service: str) -> str:
+        """Cache key for a user/service token"""
+        return f"tok:{user_id}:{service}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get cached value, or None on miss/expiry"""
+        if self._redis is not None:
+            try:
+                return await self._redis.get(key)
+            except Exception as e:
+                logger.warning(f"Redis get failed, treating as miss: {e}")
+                return None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._local.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        """Cache value for ttl seconds (no-op for non-positive ttl)"""
+        if ttl <= 0:
+            return
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(key, value, ex=ttl)
+            except Exception as e:
+                logger.warning(f"Redis set failed: {e}")
+            return
+
+        if len(self._local) >= self._MAX_LOCAL_ENTRIES:
+            self._evict_local()
+        self._local[key] = (value, time.monotonic() + min(ttl, self._MAX_LOCAL_TTL))
+
+    async def delete(self, key: str) -> None:
+        """Invalidate a cached value"""
+        if self._redis is not None:
+            try:
+                await self._redis.delete(key)
+            except Exception as e:
+                logger.warning(f"Redis delete failed: {e}")
+            return
+
+        self._local.pop(key, None)
+
+    async def aclose(self) -> None:
+        """Release the Redis connection pool"""
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def _evict_local(self) -> None:
+        """Drop expired entries; if none expired, drop the oldest"""
+        now = time.monotonic()
+        expired = [k for k, (_, exp) in self._local.items() if now >= exp]
+        for k in expired:
+            self._local.pop(k, None)
+        if not expired and self._local:
+            self._local.pop(next(iter(self._local)))
+
+# Singleton instance
+_token_cache = None
+
+def get_token_cache() -> TokenCache:
+    """Get token cache singleton"""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache()
+    return _token_cache
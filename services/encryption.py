@@ -1,48 +1,70 @@
 """
 Token encryption/decryption service
-Uses Fernet symmetric encryption for secure token storage
+Uses AES-256-GCM (hardware accelerated) for secure token storage
 """
+import base64
 import os
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EncryptionService:
-    """Service for encrypting and decrypting sensitive data"""
-    
+    """Service for encrypting and decrypting sensitive data
+
+    New ciphertexts use AES-256-GCM, which maps to OpenSSL's AES-NI path
+    and is much cheaper than Fernet's HMAC+CBC construction. Rows written
+    by older versions are still Fernet-encrypted; decrypt falls back to
+    Fernet transparently, and the regular refresh cycle rewrites them as
+    AES-GCM. Both ciphers derive from the same ENCRYPTION_KEY.
+    """
+
+    _NONCE_SIZE = 12
+
     def __init__(self):
         encryption_key = os.getenv("ENCRYPTION_KEY")
-        
+
         if not encryption_key:
             logger.warning("ENCRYPTION_KEY not set - generating new key (tokens will be lost on restart!)")
             encryption_key = Fernet.generate_key().decode()
             logger.warning(f"Generated key: {encryption_key}")
             logger.warning("Add this to your .env file as ENCRYPTION_KEY")
-        
+
         try:
-            self.cipher = Fernet(encryption_key.encode() if isinstance(encryption_key, str) else encryption_key)
+            key_str = encryption_key if isinstance(encryption_key, str) else encryption_key.decode()
+            self._aead = AESGCM(base64.urlsafe_b64decode(key_str.encode()))
+            # Legacy cipher for rows written before the AES-GCM switch
+            self._legacy_cipher = Fernet(key_str.encode())
             logger.info("Encryption service initialized")
         except Exception as e:
             logger.error(f"Failed to initialize encryption: {e}")
             raise RuntimeError(f"Invalid ENCRYPTION_KEY: {e}")
-    
+
     def encrypt(self, data: str) -> str:
         """Encrypt string data"""
         if not data:
             return ""
         try:
-            return self.cipher.encrypt(data.encode()).decode()
+            nonce = os.urandom(self._NONCE_SIZE)
+            ciphertext = self._aead.encrypt(nonce, data.encode(), None)
+            return base64.b64encode(nonce + ciphertext).decode()
         except Exception as e:
             logger.error(f"Encryption failed: {e}")
             raise
-    
+
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt string data"""
         if not encrypted_data:
             return ""
         try:
-            return self.cipher.decrypt(encrypted_data.encode()).decode()
+            raw = base64.b64decode(encrypted_data.encode())
+            return self._aead.decrypt(raw[:self._NONCE_SIZE], raw[self._NONCE_SIZE:], None).decode()
+        except Exception:
+            pass
+        # Fall back to the legacy Fernet format
+        try:
+            return self._legacy_cipher.decrypt(encrypted_data.encode()).decode()
         except Exception as e:
             logger.error(f"Decryption failed: {e}")
             raise RuntimeError("Failed to decrypt token - key may have changed")
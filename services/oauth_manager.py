@@ -2,47 +2,59 @@
 OAuth2 Manager - Core OAuth2 flow logic
 Handles authorization, token exchange, refresh, and revocation
 """
+import asyncio
+import base64
+import hashlib
+import hmac
 import os
 import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode
+import httpx
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from services.cache import TokenCache, get_token_cache
 from services.database import OAuthToken, get_session
 from services.encryption import get_encryption_service
 
 logger = logging.getLogger(__name__)
 
+GOOGLE_AUTH_URI = "https://accounts.google.com/o/oauth2/auth"
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
 # Google OAuth2 scopes for different services
 GOOGLE_SCOPES = {
-    "gmail": [
+    "gmail": (
         "https://www.googleapis.com/auth/gmail.send",
         "https://www.googleapis.com/auth/gmail.readonly",
         "https://www.googleapis.com/auth/gmail.modify"
-    ],
-    "drive": [
+    ),
+    "drive": (
         "https://www.googleapis.com/auth/drive.file",
         "https://www.googleapis.com/auth/drive.readonly"
-    ],
-    "calendar": [
+    ),
+    "calendar": (
         "https://www.googleapis.com/auth/calendar",
         "https://www.googleapis.com/auth/calendar.events"
-    ],
-    "meet": [
+    ),
+    "meet": (
         "https://www.googleapis.com/auth/calendar.events",
         "https://www.googleapis.com/auth/meetings.space.created"
-    ],
-    "sheets": [
+    ),
+    "sheets": (
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/spreadsheets.readonly"
-    ]
+    )
 }
 
+# Pre-serialized scopes for storage, avoids json.dumps per exchange
+_SCOPES_JSON = {svc: json.dumps(scopes) for svc, scopes in GOOGLE_SCOPES.items()}
+
 class OAuthManager:
     """OAuth2 flow manager for Google services"""
     
@@ -54,8 +66,74 @@ class OAuthManager:
         
         if not all([self.client_id, self.client_secret, self.redirect_uri]):
             raise RuntimeError("Missing Google OAuth2 configuration. Check .env file.")
-        
+
+        # Built once - every Flow on the authorize/callback path reuses it
+        self._client_config = {
+            "web": {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "auth_uri": GOOGLE_AUTH_URI,
+                "token_uri": GOOGLE_TOKEN_URI,
+                "redirect_uris": [self.redirect_uri]
+            }
+        }
+        # Key for signing the OAuth state parameter (CSRF protection)
+        self._state_key = os.getenv("STATE_SIGNING_KEY", self.client_secret).encode()
+
+        # Pre-rendered authorization URLs - one urlencode per service at
+        # startup instead of a Flow construction per authorize request.
+        # prompt=consent forces re-consent so Google returns a refresh token.
+        self._auth_url_templates = {
+            svc: GOOGLE_AUTH_URI + "?" + urlencode({
+                "response_type": "code",
+                "client_id": self.client_id,
+                "redirect_uri": self.redirect_uri,
+                "scope": " ".join(scopes),
+                "access_type": "offline",
+                "include_granted_scopes": "true",
+                "prompt": "consent"
+            }) + "&state={state}"
+            for svc, scopes in GOOGLE_SCOPES.items()
+        }
+
+        # Shared HTTP/2 client for all Google token traffic - keep-alive
+        # amortizes the TLS handshake across refreshes
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=10.0
+        )
+
         logger.info("OAuth Manager initialized")
+
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        await self._http.aclose()
+
+    def _make_state(self, user_id: str, service: str) -> str:
+        """Build a compact HMAC-signed state parameter"""
+        payload = f"{user_id}|{service}"
+        signature = hmac.new(self._state_key, payload.encode(), hashlib.sha256).digest()[:12]
+        return payload + "|" + base64.urlsafe_b64encode(signature).decode()
+
+    def _parse_state(self, state: str) -> tuple:
+        """Validate a signed state parameter and return (user_id, service)
+
+        Raises:
+            ValueError: If the state is malformed or the signature is invalid
+        """
+        try:
+            payload, signature_b64 = state.rsplit("|", 1)
+            user_id, service = payload.rsplit("|", 1)
+            signature = base64.urlsafe_b64decode(signature_b64)
+        except (ValueError, TypeError):
+            raise ValueError("Malformed state parameter")
+
+        expected = hmac.new(self._state_key, payload.encode(), hashlib.sha256).digest()[:12]
+        if not hmac.compare_digest(signature, expected):
+            raise ValueError("Invalid state signature")
+
+        return user_id, service
     
     def get_authorization_url(self, user_id: str, service: str, state: Optional[str] = None) -> str:
         """
@@ -71,34 +149,14 @@ class OAuthManager:
         """
         if service not in GOOGLE_SCOPES:
             raise ValueError(f"Unsupported service: {service}. Supported: {list(GOOGLE_SCOPES.keys())}")
-        
-        scopes = GOOGLE_SCOPES[service]
-        
-        # Create state with user_id and service
+
+        # Create signed state carrying user_id and service
         if not state:
-            state = json.dumps({"user_id": user_id, "service": service})
-        
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [self.redirect_uri]
-                }
-            },
-            scopes=scopes,
-            redirect_uri=self.redirect_uri
-        )
-        
-        auth_url, _ = flow.authorization_url(
-            access_type='offline',
-            include_granted_scopes='true',
-            state=state,
-            prompt='consent'  # Force consent to get refresh token
-        )
-        
+            state = self._make_state(user_id, service)
+
+        # The URL is precomputed per service; only the state varies
+        auth_url = self._auth_url_templates[service].format(state=quote(state, safe=""))
+
         logger.info(f"Generated authorization URL for user {user_id}, service {service}")
         return auth_url
     
@@ -115,38 +173,24 @@ class OAuthManager:
             Token information dict
         """
         try:
-            # Parse state
-            state_data = json.loads(state)
-            user_id = state_data["user_id"]
-            service = state_data["service"]
+            # Validate and parse the signed state
+            user_id, service = self._parse_state(state)
             scopes = GOOGLE_SCOPES[service]
             
             # Create flow and exchange code
             flow = Flow.from_client_config(
-                {
-                    "web": {
-                        "client_id": self.client_id,
-                        "client_secret": self.client_secret,
-                        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                        "token_uri": "https://oauth2.googleapis.com/token",
-                        "redirect_uris": [self.redirect_uri]
-                    }
-                },
+                self._client_config,
                 scopes=scopes,
                 redirect_uri=self.redirect_uri,
                 autogenerate_code_verifier=True
             )
             
-            # Disable scope verification - Google may return additional scopes 
-            # from previously authorized services
-            import os
-            os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
-            
-            flow.fetch_token(code=code)
+            # The exchange is a blocking requests call - keep it off the event loop
+            await asyncio.to_thread(flow.fetch_token, code=code)
             credentials = flow.credentials
             
-            # Calculate expiration
-            expires_at = datetime.utcnow() + timedelta(seconds=credentials.expiry.timestamp() - datetime.utcnow().timestamp() if credentials.expiry else 3600)
+            # Google reports the expiry directly; only fall back to 1h if absent
+            expires_at = credentials.expiry if credentials.expiry else datetime.utcnow() + timedelta(seconds=3600)
             
             # Encrypt tokens
             encrypted_access_token = self.encryption.encrypt(credentials.token)
@@ -155,16 +199,15 @@ class OAuthManager:
             # Store in database
             token_id = f"{user_id}_{service}"
             
-            # Check if token already exists
-            result = await session.execute(select(OAuthToken).where(OAuthToken.id == token_id))
-            existing_token = result.scalar_one_or_none()
+            # Check if token already exists (PK lookup hits the identity map)
+            existing_token = await session.get(OAuthToken, token_id)
             
             if existing_token:
                 # Update existing token
                 existing_token.access_token = encrypted_access_token
                 existing_token.refresh_token = encrypted_refresh_token
                 existing_token.expires_at = expires_at
-                existing_token.scopes = json.dumps(scopes)
+                existing_token.scopes = _SCOPES_JSON[service]
                 existing_token.updated_at = datetime.utcnow()
             else:
                 # Create new token
@@ -176,12 +219,15 @@ class OAuthManager:
                     refresh_token=encrypted_refresh_token,
                     token_type="Bearer",
                     expires_at=expires_at,
-                    scopes=json.dumps(scopes)
+                    scopes=_SCOPES_JSON[service]
                 )
                 session.add(oauth_token)
             
             await session.commit()
-            
+
+            # A re-authorization replaces the stored token
+            await get_token_cache().delete(TokenCache.token_key(user_id, service))
+
             logger.info(f"Token stored for user {user_id}, service {service}")
             
             return {
@@ -209,11 +255,17 @@ class OAuthManager:
             Valid access token or None if not found/failed
         """
         token_id = f"{user_id}_{service}"
-        
-        # Fetch token from database
-        result = await session.execute(select(OAuthToken).where(OAuthToken.id == token_id))
-        oauth_token = result.scalar_one_or_none()
-        
+
+        # Cache hit skips the SQLite read and Fernet decrypt entirely
+        cache = get_token_cache()
+        cache_key = TokenCache.token_key(user_id, service)
+        cached_token = await cache.get(cache_key)
+        if cached_token:
+            return cached_token
+
+        # Fetch token from database by primary key
+        oauth_token = await session.get(OAuthToken, token_id)
+
         if not oauth_token:
             logger.warning(f"No token found for user {user_id}, service {service}")
             return None
@@ -226,67 +278,79 @@ class OAuthManager:
                 logger.error(f"No refresh token available for user {user_id}, service {service}")
                 return None
             
-            # Refresh token
-            try:
-                refreshed = await self._refresh_token(oauth_token, session)
-                if not refreshed:
-                    return None
-                # Reload token after refresh
-                await session.refresh(oauth_token)
-            except Exception as e:
-                logger.error(f"Token refresh failed: {e}")
-                return None
-        
+            # Refresh token - returns the new plaintext token (and caches
+            # it), so no reload/re-decrypt round trip is needed
+            new_token = await self._refresh_token(oauth_token, session)
+            return new_token
+
         # Decrypt and return access token
         try:
-            return self.encryption.decrypt(oauth_token.access_token)
+            token = self.encryption.decrypt(oauth_token.access_token)
         except Exception as e:
             logger.error(f"Failed to decrypt token: {e}")
             return None
+
+        # Cache until shortly before expiry so refresh still happens on time
+        ttl = int((oauth_token.expires_at - datetime.utcnow()).total_seconds()) - 60
+        await cache.set(cache_key, token, ttl)
+
+        return token
     
-    async def _refresh_token(self, oauth_token: OAuthToken, session: AsyncSession) -> bool:
+    async def _refresh_token(self, oauth_token: OAuthToken, session: AsyncSession) -> Optional[str]:
         """
         Refresh an expired access token
-        
+
         Args:
             oauth_token: OAuthToken object
             session: Database session
-            
+
         Returns:
-            True if refresh successful
+            New plaintext access token, or None if refresh failed
         """
         try:
             # Decrypt refresh token
             refresh_token = self.encryption.decrypt(oauth_token.refresh_token)
-            scopes = json.loads(oauth_token.scopes)
-            
-            # Create credentials object
-            credentials = Credentials(
-                token=None,
-                refresh_token=refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=self.client_id,
-                client_secret=self.client_secret,
-                scopes=scopes
+
+            # POST to Google's token endpoint over the shared pooled client
+            response = await self._http.post(
+                GOOGLE_TOKEN_URI,
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": refresh_token,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret
+                }
+            )
+            response.raise_for_status()
+            token_data = response.json()
+            access_token = token_data["access_token"]
+            expires_in = int(token_data.get("expires_in", 3600))
+
+            # Single UPDATE - skips the ORM flush and post-commit reload
+            await session.execute(
+                update(OAuthToken)
+                .where(OAuthToken.id == oauth_token.id)
+                .values(
+                    access_token=self.encryption.encrypt(access_token),
+                    expires_at=datetime.utcnow() + timedelta(seconds=expires_in),
+                    updated_at=datetime.utcnow()
+                )
             )
-            
-            # Refresh
-            from google.auth.transport.requests import Request
-            credentials.refresh(Request())
-            
-            # Update database
-            oauth_token.access_token = self.encryption.encrypt(credentials.token)
-            oauth_token.expires_at = datetime.utcnow() + timedelta(seconds=3600)
-            oauth_token.updated_at = datetime.utcnow()
-            
             await session.commit()
-            
+
+            # Replace any cached copy of the old access token
+            await get_token_cache().set(
+                TokenCache.token_key(oauth_token.user_id, oauth_token.service),
+                access_token,
+                expires_in - 60
+            )
+
             logger.info(f"Token refreshed for user {oauth_token.user_id}, service {oauth_token.service}")
-            return True
-            
+            return access_token
+
         except Exception as e:
             logger.error(f"Token refresh failed: {e}")
-            return False
+            return None
     
     async def revoke_token(self, user_id: str, service: str, session: AsyncSession) -> bool:
         """
@@ -301,10 +365,9 @@ class OAuthManager:
             True if revoked successfully
         """
         token_id = f"{user_id}_{service}"
-        
-        result = await session.execute(select(OAuthToken).where(OAuthToken.id == token_id))
-        oauth_token = result.scalar_one_or_none()
-        
+
+        oauth_token = await session.get(OAuthToken, token_id)
+
         if not oauth_token:
             logger.warning(f"No token to revoke for user {user_id}, service {service}")
             return False
@@ -312,7 +375,9 @@ class OAuthManager:
         # Delete from database
         await session.delete(oauth_token)
         await session.commit()
-        
+
+        await get_token_cache().delete(TokenCache.token_key(user_id, service))
+
         logger.info(f"Token revoked for user {user_id}, service {service}")
         return True
 
@@ -325,3 +390,10 @@ def get_oauth_manager() -> OAuthManager:
     if _oauth_manager is None:
         _oauth_manager = OAuthManager()
     return _oauth_manager
+
+async def close_oauth_manager():
+    """Close the OAuth manager's HTTP client, if one was created"""
+    global _oauth_manager
+    if _oauth_manager is not None:
+        await _oauth_manager.aclose()
+        _oauth_manager = None